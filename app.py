@@ -14,27 +14,70 @@ Features:
 Endpoint: POST /generate-qr-postcard
 """
 
-from flask import Flask, request, jsonify, send_file
-from PIL import Image
-import qrcode
-import io
+from flask import Flask, Request, request, jsonify, send_file, after_this_request
+from PIL import Image, ImageColor
+import numpy as np
+import segno
 import base64
+import hashlib
+import hmac
+import io
+import json
 import tempfile
 import os
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
-from functools import wraps
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.utils import ImageReader
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.targets import ValueTarget
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+import img2pdf
+
+class PostcardRequest(Request):
+    """Request class tuned for multi-MB postcard uploads.
+
+    Werkzeug's default multipart parser spools file parts through small
+    temp-file writes; spooling into a 4MB in-memory buffer keeps typical
+    postcard uploads off disk entirely and out of the slow path.
+    """
+
+    # Allow larger non-file form parts than Werkzeug's 500KB default
+    max_form_memory_size = 4 * 1024 * 1024
+
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024, mode='rb+')
 
 app = Flask(__name__)
+app.request_class = PostcardRequest
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Cap decoded size so decompression bombs are rejected from the header
+# alone, before any pixel data is decoded (64MP >> any postcard size)
+Image.MAX_IMAGE_PIXELS = 64_000_000
+
+# Shared pool for the per-request image encodes; bounded so a burst of
+# requests can't fan out unboundedly
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# On-disk cache of finished PDFs keyed by content hash; lives under the
+# system temp dir so the OS reclaims it eventually
+_PDF_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'qr-postcard-cache')
+os.makedirs(_PDF_CACHE_DIR, exist_ok=True)
+
 # QR Positioning Configuration (percentage-based)
 QR_CENTER_X_PERCENT = 84.73  # 84.73% of width
 QR_CENTER_Y_PERCENT = 78.59  # 78.59% of height
 QR_SIZE_PERCENT = 15.88      # 15.88% of width
 
+# Fractions precomputed once so the hot path never divides by 100
+_QR_CENTER_X_FRAC = QR_CENTER_X_PERCENT / 100.0
+_QR_CENTER_Y_FRAC = QR_CENTER_Y_PERCENT / 100.0
+_QR_SIZE_FRAC = QR_SIZE_PERCENT / 100.0
+
+QRPosition = namedtuple('QRPosition', ['size', 'center_x', 'center_y', 'top_left_x', 'top_left_y'])
+
 # Postcard type configurations
 POSTCARD_TYPES = {
     '6x4': {
@@ -60,111 +103,263 @@ POSTCARD_TYPES = {
     }
 }
 
-# API Key for security
+# API Key for security (bytes form cached for comparison)
 API_KEY = os.environ.get('API_KEY', 'your-secret-api-key-change-this')
+API_KEY_BYTES = API_KEY.encode()
+
+# Only fall back to form-field auth for small bodies: reading request.form
+# parses the entire multipart payload before authentication has happened
+FORM_AUTH_MAX_BYTES = 1024 * 1024
 
 def require_api_key(f):
     """Decorator to require API key authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        api_key = request.headers.get('X-API-Key') or request.form.get('api_key')
+        # Check the header before the form field: touching request.form
+        # forces a full multipart parse even for rejected requests
+        api_key = request.headers.get('X-API-Key')
+
+        if api_key is None and (request.content_length or 0) <= FORM_AUTH_MAX_BYTES:
+            api_key = request.form.get('api_key')
 
         if not api_key:
-            return jsonify({'error': 'API key required. Provide via X-API-Key header or api_key form field.'}), 401
+            return jsonify({'error': 'API key required. Provide via X-API-Key header or api_key form field '
+                                     '(large uploads must use the X-API-Key header).'}), 401
 
-        if api_key != API_KEY:
+        # Constant-time comparison to avoid a timing side-channel
+        if not hmac.compare_digest(api_key.encode(), API_KEY_BYTES):
             return jsonify({'error': 'Invalid API key'}), 403
 
         return f(*args, **kwargs)
     return decorated_function
 
+def _read_upload_fields(req):
+    """Read the postcard upload fields from the multipart body.
+
+    When the body hasn't been parsed yet (header-authenticated requests),
+    feed request.stream through streaming_form_data in 64KB chunks instead
+    of letting Werkzeug's slower parser buffer the whole payload. Falls
+    back to the already-parsed Werkzeug view when the form-auth path (or a
+    non-multipart request) got there first.
+
+    Returns (front_bytes, back_bytes, url, postcard_type); missing parts
+    are None.
+    """
+    if 'form' not in req.__dict__ and req.mimetype == 'multipart/form-data':
+        front = ValueTarget()
+        back = ValueTarget()
+        url = ValueTarget()
+        postcard_type = ValueTarget()
+
+        parser = StreamingFormDataParser(headers=dict(req.headers))
+        parser.register('front_image', front)
+        parser.register('back_image', back)
+        parser.register('url', url)
+        parser.register('postcard_type', postcard_type)
+
+        while True:
+            chunk = req.stream.read(65536)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+
+        return (
+            bytes(front.value) if front.multipart_filename else None,
+            bytes(back.value) if back.multipart_filename else None,
+            url.value.decode() if url.value else None,
+            postcard_type.value.decode() if postcard_type.value else None,
+        )
+
+    def file_bytes(name):
+        part = req.files.get(name)
+        if part is None or part.filename == '':
+            return None
+        return part.stream.read()
+
+    return (file_bytes('front_image'), file_bytes('back_image'),
+            req.form.get('url'), req.form.get('postcard_type'))
+
+@lru_cache(maxsize=64)
 def calculate_qr_position(postcard_width, postcard_height):
-    """Calculate QR position and size based on postcard dimensions"""
+    """Calculate QR position and size based on postcard dimensions
+
+    Pure function of the dimensions, and uploads cluster around a handful
+    of postcard sizes, so the result is memoized.
+    """
 
     # Calculate QR size based on percentage of width
-    qr_size = int((QR_SIZE_PERCENT / 100) * postcard_width)
+    qr_size = int(_QR_SIZE_FRAC * postcard_width)
 
     # Calculate center position based on percentages
-    center_x = int((QR_CENTER_X_PERCENT / 100) * postcard_width)
-    center_y = int((QR_CENTER_Y_PERCENT / 100) * postcard_height)
+    center_x = int(_QR_CENTER_X_FRAC * postcard_width)
+    center_y = int(_QR_CENTER_Y_FRAC * postcard_height)
 
     # Calculate top-left position
     top_left_x = center_x - (qr_size // 2)
     top_left_y = center_y - (qr_size // 2)
 
-    # Ensure QR doesn't go outside bounds
+    # Ensure QR doesn't go outside bounds. This clamp is load-bearing: the
+    # endpoint validates minimum dimensions but not aspect ratio, so a very
+    # wide upload makes the width-derived QR taller than the 21.4% of height
+    # left below the center point and the Y clamp fires. (For the standard
+    # 1.5:1 and 1.83:1 aspects it never does.)
     top_left_x = max(0, min(top_left_x, postcard_width - qr_size))
     top_left_y = max(0, min(top_left_y, postcard_height - qr_size))
 
-    return {
-        'size': qr_size,
-        'center_x': center_x,
-        'center_y': center_y,
-        'top_left_x': top_left_x,
-        'top_left_y': top_left_y
-    }
+    return QRPosition(qr_size, center_x, center_y, top_left_x, top_left_y)
 
-def detect_background_color(postcard_image, center_x, center_y):
-    """Detect the background color at the QR center position"""
-    # Get the pixel color at the center of where QR will be placed
-    pixel_color = postcard_image.getpixel((center_x, center_y))
+# Warm the position cache for the canonical size of each postcard type so
+# min-sized uploads never compute it, even on the first request
+for _type_config in POSTCARD_TYPES.values():
+    calculate_qr_position(_type_config['min_width'], _type_config['min_height'])
 
-    # Convert to RGB if it's RGBA
-    if len(pixel_color) == 4:
-        pixel_color = pixel_color[:3]
+def detect_background_color(postcard_image, center_x, center_y):
+    """Detect the background color around the QR center position"""
+    # Sample a small patch around the center instead of a single pixel —
+    # a lone getpixel is noise-prone on textured postcards. The crop is a
+    # single C memcpy and the median is robust to stray speckles.
+    width, height = postcard_image.size
+    left = max(0, center_x - 8)
+    top = max(0, center_y - 8)
+    right = min(width, center_x + 8)
+    bottom = min(height, center_y + 8)
+
+    patch = np.asarray(postcard_image.crop((left, top, right, bottom)).convert('RGB'))
+    pixel_color = np.median(patch.reshape(-1, 3), axis=0).astype(int)
 
     # Check if the color is black or very dark (sum of RGB < 30)
-    if sum(pixel_color) < 30:
-        return "white"  # Use white if background is black/dark
-
-    # Convert RGB tuple to hex string
-    return f"#{pixel_color[0]:02x}{pixel_color[1]:02x}{pixel_color[2]:02x}"
-
-def generate_qr_code(url, background_color="#cefe05"):
-    """Generate QR code with specified background color"""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=1,  # Minimal border for larger QR
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
-
-    # Create QR with detected background color
-    qr_img = qr.make_image(fill_color="black", back_color=background_color)
-    return qr_img
+    if pixel_color.sum() < 30:
+        return (255, 255, 255)  # Use white if background is black/dark
+
+    # Return the RGB tuple directly — formatting to hex and parsing it
+    # back in the QR renderer would be a pointless round-trip
+    return (int(pixel_color[0]), int(pixel_color[1]), int(pixel_color[2]))
+
+@lru_cache(maxsize=1024)
+def _qr_matrix(url):
+    """Padded QR module matrix for a URL, with a 1-module quiet-zone border.
+
+    Cached separately from the rendered image: batch runs typically reuse
+    one landing URL across many postcard sizes and colors, and this lets
+    those variants skip matrix generation. The array is marked read-only
+    since lru_cache hands the same object to every caller.
+    """
+    # make_qr, not make: make() auto-selects Micro QR for short payloads,
+    # which most consumer scanners cannot read
+    qr = segno.make_qr(url, error='l')
+    matrix = np.pad(np.array(qr.matrix, dtype=np.uint8), 1)
+    matrix.flags.writeable = False
+    return matrix
+
+# Warm the matrix cache for known campaign URLs (comma-separated env var)
+# at import time: under gunicorn --preload this runs once in the master, so
+# every worker inherits the populated cache copy-on-write
+for _warmup_url in os.environ.get('QR_WARMUP_URLS', '').split(','):
+    if _warmup_url.strip():
+        _qr_matrix(_warmup_url.strip())
+
+def _render_qr_array(url, background_color, target_size):
+    """Expand the cached module matrix into a uint8 RGB pixel array.
+
+    Each module's pixel width is computed so the result lands on
+    target_size exactly, with the remainder spread across the grid, so no
+    resampling pass is needed afterwards.
+    """
+    matrix = _qr_matrix(url)
+    total_modules = matrix.shape[0]
+
+    if isinstance(background_color, str):
+        background_color = ImageColor.getrgb(background_color)
+
+    dark = np.array((0, 0, 0), dtype=np.uint8)
+    light = np.array(background_color, dtype=np.uint8)
+    rgb = np.where(matrix[..., None], dark, light)
+
+    if target_size is not None:
+        base_scale, extra = divmod(target_size, total_modules)
+    else:
+        base_scale, extra = 10, 0
+
+    # Per-module repeat counts: base width everywhere, remainder pixels
+    # spread evenly so no resize is needed to hit target_size
+    repeats = np.full(total_modules, max(1, base_scale), dtype=np.intp)
+    if base_scale >= 1 and extra:
+        repeats[np.linspace(0, total_modules, extra, endpoint=False).astype(int)] += 1
+
+    return np.repeat(np.repeat(rgb, repeats, axis=0), repeats, axis=1)
+
+def generate_qr_code(url, background_color="#cefe05", target_size=None):
+    """Generate QR code with specified background color as a PIL image"""
+    return Image.fromarray(_render_qr_array(url, background_color, target_size))
+
+# 128 entries: unlike the <10KB matrices, a rendered tile is hundreds of
+# KB (size² × 3 bytes), so the worst case stays under ~100MB
+@lru_cache(maxsize=128)
+def _build_qr(url, size, background_color):
+    """Rendered QR pixel array, cached per (url, size, background_color).
+
+    Returns a read-only uint8 RGB ndarray of shape (size, size, 3) ready to
+    slice-assign into the postcard's pixel array — no PIL object is created
+    anywhere on the hot path. Repeated requests for the same URL skip QR
+    encoding and rendering entirely.
+    """
+    pixels = _render_qr_array(url, background_color, size)
+
+    # _render_qr_array hits the target size exactly except in the degenerate
+    # case where size is smaller than the module grid; NEAREST is a pixel
+    # copy and QR codes tolerate it, unlike a full Lanczos convolution
+    if pixels.shape[0] != size:
+        resized = Image.fromarray(pixels).resize((size, size), Image.Resampling.NEAREST)
+        pixels = np.asarray(resized)
+
+    pixels = np.ascontiguousarray(pixels)
+    pixels.flags.writeable = False
+    return pixels
 
 def apply_qr_to_postcard(postcard_image, qr_url):
     """Apply QR code to postcard at calculated percentage-based position with matching background color"""
 
+    # Normalize to RGB up front: pasting RGB onto RGB is a straight row
+    # copy in C, while mixed modes (RGBA/palette) hit slower convert paths
+    if postcard_image.mode != 'RGB':
+        postcard_image = postcard_image.convert('RGB')
+
     # Get postcard dimensions
     postcard_width, postcard_height = postcard_image.size
 
     # Calculate QR position and size based on percentages
-    qr_config = calculate_qr_position(postcard_width, postcard_height)
+    qr_position = calculate_qr_position(postcard_width, postcard_height)
 
     # Detect background color at QR center position
-    background_color = detect_background_color(postcard_image, qr_config['center_x'], qr_config['center_y'])
-
-    # Generate QR code with detected background color
-    qr_image = generate_qr_code(qr_url, background_color)
-
-    # Resize QR to calculated size
-    qr_resized = qr_image.resize((qr_config['size'], qr_config['size']), Image.Resampling.LANCZOS)
-
-    # Apply QR to postcard at calculated position
-    postcard_image.paste(qr_resized, (qr_config['top_left_x'], qr_config['top_left_y']))
-
-    # Add background color info to config for debugging
-    qr_config['background_color'] = background_color
+    background_color = detect_background_color(postcard_image, qr_position.center_x, qr_position.center_y)
+
+    # Generate (or fetch cached) QR code at target size with detected background color
+    qr_array = _build_qr(qr_url, qr_position.size, background_color)
+    qr_size = qr_array.shape[:2]
+
+    # Apply QR to postcard at calculated position. The QR is an opaque RGB
+    # block on an RGB postcard, so a slice assignment on the pixel array
+    # replaces PIL paste's mode/alpha negotiation; fromarray shares the
+    # buffer, so this costs one array materialization total.
+    pixels = np.array(postcard_image)
+    top, left = qr_position.top_left_y, qr_position.top_left_x
+    # Crop the QR to the available region like PIL paste did: on extreme
+    # aspect ratios the width-derived QR can be taller than the postcard
+    rows = min(qr_size[0], pixels.shape[0] - top)
+    cols = min(qr_size[1], pixels.shape[1] - left)
+    pixels[top:top + rows, left:left + cols] = qr_array[:rows, :cols]
+    postcard_image = Image.fromarray(pixels)
+
+    # Add background color info to config for debugging (hex, since it
+    # only ever ends up in a response header)
+    qr_config = qr_position._asdict()
+    qr_config['background_color'] = '#{:02x}{:02x}{:02x}'.format(*background_color)
 
     return postcard_image, qr_config
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
+# The health and root payloads are static, so serialize them once at import
+# instead of rebuilding and re-encoding the dicts on every poll
+_HEALTH_BODY = json.dumps({
         'status': 'healthy',
         'service': 'QR Postcard Generator',
         'version': '2.0.0',
@@ -182,6 +377,11 @@ def health_check():
         }
     })
 
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return app.response_class(_HEALTH_BODY, mimetype='application/json')
+
 @app.route('/generate-qr-postcard', methods=['POST'])
 @require_api_key
 def generate_qr_postcard():
@@ -201,32 +401,26 @@ def generate_qr_postcard():
     """
 
     try:
+        # Parse the multipart body (streamed in chunks when possible) and
+        # read each upload into memory once: the raw bytes feed both PIL
+        # and content hashing
+        front_bytes, back_bytes, qr_url, postcard_type = _read_upload_fields(request)
+
         # Validate request
-        if 'front_image' not in request.files:
+        if front_bytes is None:
             return jsonify({'error': 'No front_image file provided'}), 400
 
-        if 'back_image' not in request.files:
+        if back_bytes is None:
             return jsonify({'error': 'No back_image file provided'}), 400
 
-        if 'url' not in request.form:
+        if qr_url is None:
             return jsonify({'error': 'No URL provided'}), 400
 
-        if 'postcard_type' not in request.form:
+        if postcard_type is None:
             return jsonify({'error': 'No postcard_type provided'}), 400
 
-        front_image_file = request.files['front_image']
-        back_image_file = request.files['back_image']
-        qr_url = request.form['url']
-        postcard_type = request.form['postcard_type']
-
-        if front_image_file.filename == '':
-            return jsonify({'error': 'No front_image file selected'}), 400
-
-        if back_image_file.filename == '':
-            return jsonify({'error': 'No back_image file selected'}), 400
-
         # Validate URL
-        if not qr_url or len(qr_url.strip()) == 0:
+        if len(qr_url.strip()) == 0:
             return jsonify({'error': 'URL cannot be empty'}), 400
 
         # Validate postcard type
@@ -234,9 +428,35 @@ def generate_qr_postcard():
             valid_types = list(POSTCARD_TYPES.keys())
             return jsonify({'error': f'Invalid postcard_type. Valid types: {valid_types}'}), 400
 
+        # Identical inputs produce identical PDFs, so repeated requests are
+        # served straight from disk. BLAKE2 hashes multi-MB uploads in well
+        # under a millisecond.
+        # Each field is length-prefixed so boundaries are unambiguous —
+        # without it, shifting bytes between front and back would collide.
+        hasher = hashlib.blake2b(digest_size=16)
+        for field in (front_bytes, back_bytes,
+                      qr_url.strip().encode(), postcard_type.encode()):
+            hasher.update(len(field).to_bytes(8, 'big'))
+            hasher.update(field)
+        cache_path = os.path.join(_PDF_CACHE_DIR, hasher.hexdigest() + '.pdf')
+        meta_path = cache_path + '.json'
+
+        if os.path.exists(cache_path) and os.path.exists(meta_path):
+            with open(meta_path) as meta_file:
+                debug_headers = json.load(meta_file)
+            response = send_file(
+                cache_path,
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name='qr_postcard.pdf',
+                conditional=True
+            )
+            response.headers.extend(debug_headers)
+            return response
+
         # Load and validate front image (gets QR processing)
         try:
-            front_postcard = Image.open(front_image_file.stream)
+            front_postcard = Image.open(io.BytesIO(front_bytes))
 
             # Validate front image dimensions based on postcard type
             width, height = front_postcard.size
@@ -247,12 +467,29 @@ def generate_qr_postcard():
                     'error': f'Front image too small for {postcard_type}. Minimum: {min_config["min_width"]}x{min_config["min_height"]}px'
                 }), 400
 
+            # Oversized JPEG uploads carry far more pixels than the 300 DPI
+            # PDF page needs; draft() lets libjpeg downscale in the IDCT
+            # domain during decode (1/2, 1/4, 1/8) and is a no-op for PNG.
+            # Validation above used the original dimensions.
+            front_postcard.draft('RGB', (
+                int(min_config['pdf_width_inches'] * 300),
+                int(min_config['pdf_height_inches'] * 300)
+            ))
+
+            # Dimension checks above only parsed the header; decode now so
+            # corrupt pixel data surfaces here as a 400, not mid-render,
+            # and normalize the mode so every downstream stage (sampling,
+            # compositing, JPEG encode) can assume RGB
+            front_postcard.load()
+            if front_postcard.mode != 'RGB':
+                front_postcard = front_postcard.convert('RGB')
+
         except Exception as e:
             return jsonify({'error': f'Invalid front_image file: {str(e)}'}), 400
 
         # Load and validate back image (static, no QR processing)
         try:
-            back_postcard = Image.open(back_image_file.stream)
+            back_postcard = Image.open(io.BytesIO(back_bytes))
 
             # Validate back image dimensions based on postcard type
             back_width, back_height = back_postcard.size
@@ -262,14 +499,27 @@ def generate_qr_postcard():
                     'error': f'Back image too small for {postcard_type}. Minimum: {min_config["min_width"]}x{min_config["min_height"]}px'
                 }), 400
 
+            back_postcard.draft('RGB', (
+                int(min_config['pdf_width_inches'] * 300),
+                int(min_config['pdf_height_inches'] * 300)
+            ))
+
+            back_postcard.load()
+            if back_postcard.mode != 'RGB':
+                back_postcard = back_postcard.convert('RGB')
+
         except Exception as e:
             return jsonify({'error': f'Invalid back_image file: {str(e)}'}), 400
 
         # Apply QR code with percentage-based positioning to front image only
         result_front_postcard, qr_config = apply_qr_to_postcard(front_postcard, qr_url.strip())
 
-        # Convert images to 2-page PDF with standard postcard dimensions
-        pdf_buffer = io.BytesIO()
+        # Convert images to 2-page PDF with standard postcard dimensions.
+        # Render to a temp file in the cache dir so send_file can hand the
+        # path to the WSGI file wrapper (sendfile(2) on supporting servers);
+        # an atomic rename publishes it into the cache when complete.
+        pdf_file = tempfile.NamedTemporaryFile(
+            suffix='.pdf', delete=False, dir=_PDF_CACHE_DIR)
 
         # Get postcard type configuration for PDF dimensions
         postcard_config = POSTCARD_TYPES[postcard_type]
@@ -278,60 +528,195 @@ def generate_qr_postcard():
         pdf_width_points = postcard_config['pdf_width_inches'] * 72
         pdf_height_points = postcard_config['pdf_height_inches'] * 72
 
-        # Create PDF canvas with standard postcard dimensions
-        c = canvas.Canvas(pdf_buffer, pagesize=(pdf_width_points, pdf_height_points))
+        # Encode both pages as JPEG once; img2pdf embeds the JPEG bytes in
+        # the PDF as-is instead of re-compressing them through Flate.
+        # Pillow releases the GIL inside save(), so encoding the two pages
+        # on the executor runs them genuinely in parallel.
+        front_buffer = io.BytesIO()
+        back_buffer = io.BytesIO()
+        front_future = _EXECUTOR.submit(
+            result_front_postcard.save, front_buffer, format='JPEG', quality=85)
+        back_future = _EXECUTOR.submit(
+            back_postcard.save, back_buffer, format='JPEG', quality=85)
+        front_future.result()
+        back_future.result()
+
+        # Page 1: front image with QR code, page 2: back image, both
+        # stretched to the full fixed page size (matching the previous
+        # ReportLab drawImage behavior)
+        layout_fun = img2pdf.get_layout_fun(
+            pagesize=(pdf_width_points, pdf_height_points),
+            fit=img2pdf.FitMode.exact
+        )
+        pdf_file.write(img2pdf.convert(
+            [front_buffer.getvalue(), back_buffer.getvalue()],
+            layout_fun=layout_fun
+        ))
+        pdf_file.close()
+        os.replace(pdf_file.name, cache_path)
+
+        # Custom headers with QR positioning info, persisted alongside the
+        # PDF so cache hits return them too
+        debug_headers = {
+            'X-QR-Size': str(qr_config['size']),
+            'X-QR-Center-X': str(qr_config['center_x']),
+            'X-QR-Center-Y': str(qr_config['center_y']),
+            'X-QR-Background-Color': qr_config['background_color'],
+            'X-Front-Image-Size': f"{width}x{height}",
+            'X-Back-Image-Size': f"{back_width}x{back_height}",
+            'X-Postcard-Type': postcard_type,
+            'X-PDF-Dimensions': f"{postcard_config['pdf_width_inches']}x{postcard_config['pdf_height_inches']} inches",
+        }
+        with open(meta_path, 'w') as meta_file:
+            json.dump(debug_headers, meta_file)
 
-        # PAGE 1: Front image with QR code processing
-        front_img_buffer = io.BytesIO()
-        result_front_postcard.save(front_img_buffer, format='PNG')
-        front_img_buffer.seek(0)
-        front_img_reader = ImageReader(front_img_buffer)
+        response = send_file(
+            cache_path,
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name='qr_postcard.pdf',
+            conditional=True
+        )
+        response.headers.extend(debug_headers)
+
+        return response
+
+    except HTTPException:
+        # Werkzeug raises e.g. RequestEntityTooLarge while the body is
+        # read inside this handler; let Flask turn it into a proper 413
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+@app.route('/generate-qr-postcards-batch', methods=['POST'])
+@require_api_key
+def generate_qr_postcards_batch():
+    """
+    Batch endpoint: apply one campaign URL's QR code to many postcard fronts
+
+    Accepts:
+    - images: one or more postcard image files (repeated multipart field)
+    - url: URL to encode in QR code (form field, applied to every image)
+    - urls: per-image URLs (repeated form field, one per image; overrides url)
+    - postcard_type: Type of postcard (6x4, 9x6, or 11x6)
+    - api_key: API key for authentication (form field OR X-API-Key header)
 
-        # Scale and fit the front image to page 1
-        c.drawImage(front_img_reader, 0, 0, width=pdf_width_points, height=pdf_height_points)
+    Returns:
+    - PDF file with one page per image, in upload order
+
+    Each distinct URL's QR matrix is generated at most once; each postcard
+    only pays for its own decode, background detection, composite, and
+    JPEG encode.
+    """
 
-        # Create page 2
-        c.showPage()
+    try:
+        images = request.files.getlist('images')
+        qr_url = request.form.get('url')
+        qr_urls = request.form.getlist('urls')
+        postcard_type = request.form.get('postcard_type')
+
+        if not images:
+            return jsonify({'error': 'No images files provided'}), 400
+
+        if qr_urls:
+            if len(qr_urls) != len(images):
+                return jsonify({
+                    'error': f'Got {len(qr_urls)} urls for {len(images)} images; counts must match'
+                }), 400
+        elif qr_url is None:
+            return jsonify({'error': 'No URL provided'}), 400
+        else:
+            qr_urls = [qr_url] * len(images)
 
-        # PAGE 2: Back image (static, no QR processing)
-        back_img_buffer = io.BytesIO()
-        back_postcard.save(back_img_buffer, format='PNG')
-        back_img_buffer.seek(0)
-        back_img_reader = ImageReader(back_img_buffer)
+        if any(len(u.strip()) == 0 for u in qr_urls):
+            return jsonify({'error': 'URL cannot be empty'}), 400
 
-        # Scale and fit the back image to page 2
-        c.drawImage(back_img_reader, 0, 0, width=pdf_width_points, height=pdf_height_points)
+        if postcard_type is None:
+            return jsonify({'error': 'No postcard_type provided'}), 400
 
-        c.save()
-        pdf_buffer.seek(0)
+        if postcard_type not in POSTCARD_TYPES:
+            valid_types = list(POSTCARD_TYPES.keys())
+            return jsonify({'error': f'Invalid postcard_type. Valid types: {valid_types}'}), 400
+
+        postcard_config = POSTCARD_TYPES[postcard_type]
+        pdf_target_size = (
+            int(postcard_config['pdf_width_inches'] * 300),
+            int(postcard_config['pdf_height_inches'] * 300)
+        )
+
+        # Decode, validate, and QR each postcard. The per-(url, size, color)
+        # QR cache means the rendered block is built once and broadcast onto
+        # every postcard that shares dimensions and background.
+        page_encodes = []
+        for index, (image_file, image_url) in enumerate(zip(images, qr_urls), start=1):
+            try:
+                postcard = Image.open(image_file.stream)
+
+                width, height = postcard.size
+                if width < postcard_config['min_width'] or height < postcard_config['min_height']:
+                    return jsonify({
+                        'error': f'Image {index} too small for {postcard_type}. Minimum: {postcard_config["min_width"]}x{postcard_config["min_height"]}px'
+                    }), 400
+
+                postcard.draft('RGB', pdf_target_size)
+                postcard.load()
+                if postcard.mode != 'RGB':
+                    postcard = postcard.convert('RGB')
+
+            except Exception as e:
+                return jsonify({'error': f'Invalid image {index}: {str(e)}'}), 400
+
+            result_postcard, _ = apply_qr_to_postcard(postcard, image_url.strip())
+
+            page_buffer = io.BytesIO()
+            future = _EXECUTOR.submit(
+                result_postcard.save, page_buffer, format='JPEG', quality=85)
+            page_encodes.append((future, page_buffer))
+
+        pages = []
+        for future, page_buffer in page_encodes:
+            future.result()
+            pages.append(page_buffer.getvalue())
+
+        pdf_width_points = postcard_config['pdf_width_inches'] * 72
+        pdf_height_points = postcard_config['pdf_height_inches'] * 72
+        layout_fun = img2pdf.get_layout_fun(
+            pagesize=(pdf_width_points, pdf_height_points),
+            fit=img2pdf.FitMode.exact
+        )
+
+        pdf_file = tempfile.NamedTemporaryFile(
+            suffix='.pdf', delete=False, dir=_PDF_CACHE_DIR)
+        pdf_file.write(img2pdf.convert(pages, layout_fun=layout_fun))
+        pdf_file.close()
+
+        # Batch output isn't content-cached; delete once the response has
+        # an open descriptor (fine on Linux)
+        @after_this_request
+        def _remove_batch_pdf(response, path=pdf_file.name):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return response
 
-        # Add QR configuration to response headers for debugging
         response = send_file(
-            pdf_buffer,
+            pdf_file.name,
             mimetype='application/pdf',
             as_attachment=True,
-            download_name='qr_postcard.pdf'
+            download_name='qr_postcards.pdf'
         )
-
-        # Add custom headers with QR positioning info
-        response.headers['X-QR-Size'] = str(qr_config['size'])
-        response.headers['X-QR-Center-X'] = str(qr_config['center_x'])
-        response.headers['X-QR-Center-Y'] = str(qr_config['center_y'])
-        response.headers['X-QR-Background-Color'] = qr_config['background_color']
-        response.headers['X-Front-Image-Size'] = f"{front_postcard.size[0]}x{front_postcard.size[1]}"
-        response.headers['X-Back-Image-Size'] = f"{back_postcard.size[0]}x{back_postcard.size[1]}"
+        response.headers['X-Page-Count'] = str(len(pages))
         response.headers['X-Postcard-Type'] = postcard_type
-        response.headers['X-PDF-Dimensions'] = f"{postcard_config['pdf_width_inches']}x{postcard_config['pdf_height_inches']} inches"
 
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
-@app.route('/', methods=['GET'])
-def index():
-    """API documentation"""
-    return jsonify({
+_INDEX_BODY = json.dumps({
         'service': 'QR Postcard Generator API',
         'version': '2.0.0',
         'description': 'Scalable 2-page QR postcard generation with percentage-based positioning, outputs PDF files',
@@ -369,6 +754,17 @@ def index():
                     'X-PDF-Dimensions: PDF output dimensions in inches'
                 ]
             },
+            'POST /generate-qr-postcards-batch': {
+                'description': 'Apply one URL to many postcard fronts in a single call',
+                'authentication': 'Required via X-API-Key header or api_key form field',
+                'parameters': {
+                    'images': 'One or more postcard image files (repeated multipart field)',
+                    'url': 'URL to encode in QR code (form field, applied to every image)',
+                    'urls': 'Per-image URLs (repeated form field, one per image; overrides url)',
+                    'postcard_type': 'Type of postcard: 6x4, 9x6, or 11x6 (form field)'
+                },
+                'returns': 'PDF file with one page per image, in upload order'
+            },
             'GET /health': 'Health check and configuration',
             'GET /': 'This documentation'
         },
@@ -391,6 +787,11 @@ def index():
         }
     })
 
+@app.route('/', methods=['GET'])
+def index():
+    """API documentation"""
+    return app.response_class(_INDEX_BODY, mimetype='application/json')
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file